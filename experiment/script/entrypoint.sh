@@ -1,6 +1,6 @@
 #!/bin/bash
 
-GCP_PROJECT="${GCP_PROJECT:-k8s-jkns-gke-soak}"
+export GCP_PROJECT="${GCP_PROJECT:-k8s-jkns-gke-soak}"
 GCP_ZONE="${GCP_ZONE:-us-central1-f}"
 GCP_CLUSTER="${GCP_CLUSTER:-shanefu}"
 
@@ -1,27 +1,49 @@
 # gcloud secret manager utilities
 
+import functools
 import os
 import yaml
 
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+@functools.lru_cache(maxsize=1)
+def _secretClient():
+	# the client library is only imported on first use
+	import google.auth
+	from google.cloud import secretmanager
+	# GCP_PROJECT is the project entrypoint.sh configures; otherwise fall back to
+	# GOOGLE_CLOUD_PROJECT or the project of the application default credentials
+	credentials, project = google.auth.default()
+	project = os.environ.get("GCP_PROJECT") or project
+	if project is None:
+		raise RuntimeError("cannot determine the gcloud project, set GCP_PROJECT or GOOGLE_CLOUD_PROJECT")
+	return secretmanager.SecretManagerServiceClient(credentials=credentials), project
+
 def gcloudCreateSecret(secret_id):
-	os.system("gcloud secrets create " + secret_id +" --replication-policy=automatic")
+	client, project = _secretClient()
+	client.create_secret(parent=client.common_project_path(project), secret_id=secret_id, secret={"replication": {"automatic": {}}})
 
 def gcloudDeleteSecret(secret_id):
-	os.system("gcloud secrets delete " + secret_id)
+	client, project = _secretClient()
+	client.delete_secret(name=client.secret_path(project, secret_id))
 
-def gcloudAddSecrVersion(secret_id, file):
-	os.system("gcloud secrets versions add " +  secret_id + " --data-file " + file)
+# secret is either the path of a yaml file or an already parsed secret
+def gcloudAddSecrVersion(secret_id, secret):
+	if isinstance(secret, str):
+		with open(secret, 'rb') as f:
+			data = f.read()
+	else:
+		data = yaml.dump(secret, Dumper=Dumper, default_flow_style=False, encoding="utf-8")
+	client, project = _secretClient()
+	client.add_secret_version(parent=client.secret_path(project, secret_id), payload={"data": data})
 
 def gcloudAccessSecretVersion(secret_id, version_id):
-	secret = {}
-	os.system("gcloud secrets versions access " + version_id + " --secret " + secret_id + " > " + "gcloud_"+secret_id+".yaml")
-	with open("gcloud_"+secret_id+".yaml") as f:
-		data = yaml.load_all(f, Loader=yaml.FullLoader)
-		for d in data:
-			secret = d
-	out = 'gcloud_res.yaml'
-	with open(out, 'w') as outfile:
-		yaml.dump(secret, outfile, default_flow_style=False)
-	print("Gcloud secret:")
-	print(secret)
-	return out
+	client, project = _secretClient()
+	response = client.access_secret_version(name=client.secret_version_path(project, secret_id, version_id))
+	# the payload is already yaml, so it is written out as is rather than re-dumped
+	with open('gcloud_res.yaml', 'wb') as outfile:
+		outfile.write(response.payload.data)
+	secret = yaml.load(response.payload.data, Loader=Loader) or {}
+	print("Gcloud secret:\n{}".format(secret))
+	return secret
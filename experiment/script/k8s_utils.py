@@ -1,46 +1,66 @@
 # k8s secret manager utilities
 
-import os
+import functools
+import json
+import binascii
 import yaml
-import subprocess
-import base64
-
-def k8sCreateSecret(secret_id, file):
-	literal = ""
-	with open(file) as f:
-		data = yaml.load_all(f, Loader=yaml.FullLoader)
-		for d in data:
-			for k,v in d.items():
-				literal += " --from-literal=" + str(k) +"=" + str(v)
-	os.system("kubectl create secret generic " + secret_id + literal)
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=1)
+def _api():
+	# the kube config is only loaded on first use and then shared by every call.
+	# this is what config.load_kube_config() does, but keeping the loader lets the
+	# namespace come from the same parse of the kubeconfig
+	from kubernetes import client
+	from kubernetes.config.kube_config import KUBE_CONFIG_DEFAULT_LOCATION, KubeConfigLoader, KubeConfigMerger
+	kubeconfig = KubeConfigMerger(KUBE_CONFIG_DEFAULT_LOCATION)
+	loader = KubeConfigLoader(config_dict=kubeconfig.config, config_base_path=None, config_persister=kubeconfig.save_changes)
+	configuration = client.Configuration()
+	loader.load_and_set(configuration)
+	client.Configuration.set_default(configuration)
+	namespace = loader.current_context["context"].get("namespace", "default")
+	return client.CoreV1Api(), namespace
+
+# secret is either the path of a yaml file or an already parsed secret
+def _loadSecret(secret):
+	if isinstance(secret, str):
+		with open(secret, 'rb') as f:
+			return yaml.load(f, Loader=Loader) or {}
+	return secret
+
+def _secretBody(secret_id, secret):
+	from kubernetes import client
+	return client.V1Secret(metadata=client.V1ObjectMeta(name=secret_id), string_data={str(k): str(v) for k,v in secret.items()})
+
+def k8sCreateSecret(secret_id, secret):
+	v1, namespace = _api()
+	v1.create_namespaced_secret(namespace, _secretBody(secret_id, _loadSecret(secret)))
 
 def k8sDeleteSecret(secret_id):
-	os.system("kubectl delete secret " + secret_id)
+	v1, namespace = _api()
+	v1.delete_namespaced_secret(secret_id, namespace)
 
-def k8sUpdateSecret(secret_id, file):
-	literal = ""
-	with open(file) as f:
-		data = yaml.load_all(f, Loader=yaml.FullLoader)
-		for d in data:
-			for k,v in d.items():
-				literal += " --from-literal=" + str(k) +"=" + str(v)
-	os.system("kubectl create secret generic " + secret_id + literal + " --dry-run=client -o yaml | kubectl apply -f -")
+def k8sUpdateSecret(secret_id, secret):
+	from kubernetes.client.rest import ApiException
+	v1, namespace = _api()
+	secret = _loadSecret(secret)
+	data = {str(k): binascii.b2a_base64(str(v).encode("utf-8"), newline=False).decode("ascii") for k,v in secret.items()}
+	# a json patch replacing /data drops keys removed from the secret while leaving its metadata untouched
+	try:
+		v1.patch_namespaced_secret(secret_id, namespace, [{"op": "add", "path": "/data", "value": data}])
+	except ApiException as e:
+		if e.status != 404:
+			raise
+		v1.create_namespaced_secret(namespace, _secretBody(secret_id, secret))
 
 
 def k8sAccessSecret(secret_id):
-	secret = {}
-	os.system("kubectl get secret " + secret_id + " -o yaml > " + "k8s_"+secret_id+".yaml")
-	with open("k8s_"+secret_id+".yaml") as f:
-		data = yaml.load_all(f, Loader=yaml.FullLoader)
-
-		for d in data:
-			for k,v in d.items():
-				if k!='data': continue
-				for k_,s_ in v.items():
-					secret[k_] = base64.b64decode(s_).decode("utf-8")
-	out = 'k8s_res.yaml'
-	with open(out, 'w') as outfile:
-		yaml.dump(secret, outfile, default_flow_style=False)
-	print("K8s secret:")
-	print(secret)
-	return out
+	v1, namespace = _api()
+	data = v1.read_namespaced_secret(secret_id, namespace).data or {}
+	secret = {k: binascii.a2b_base64(v).decode("utf-8") for k,v in data.items()}
+	# the flat str -> str mapping is valid json, which is also readable as yaml
+	with open('k8s_res.json', 'w') as outfile:
+		json.dump(secret, outfile)
+	print("K8s secret:\n{}".format(secret))
+	return secret
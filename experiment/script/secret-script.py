@@ -1,17 +1,60 @@
 #!/usr/bin/env python3
 
-from gcloud_utils import *
-from k8s_utils import *
-import argparse
+from gcloud_utils import gcloudCreateSecret, gcloudAddSecrVersion, gcloudAccessSecretVersion, gcloudDeleteSecret
+from k8s_utils import k8sCreateSecret, k8sUpdateSecret, k8sAccessSecret, k8sDeleteSecret
 import sys
+import types
 
-def parse_args():
-	parser = argparse.ArgumentParser()
-	parser.add_argument('action', help='Options: create, get, update, or delete')
-	parser.add_argument('--secret_id', help='The id of the secret')
-	parser.add_argument('--file', help='The yaml file containing the secret')
-	parser.add_argument('--direction', help='Options: k2g or g2k')
-	return parser.parse_args()
+USAGE = """usage: secret-script.py action [--secret_id SECRET_ID] [--file FILE] [--direction DIRECTION]
+
+  action       Options: create, get, update, or delete
+  --secret_id  The id of the secret
+  --file       The yaml file containing the secret
+  --direction  Options: k2g or g2k"""
+
+# options are accepted as either --name=value or --name value
+def parse_args(argv):
+	args = types.SimpleNamespace(action=None, secret_id=None, file=None, direction=None)
+	argv = iter(argv)
+	for arg in argv:
+		if arg in ('-h', '--help'):
+			print(USAGE)
+			sys.exit(0)
+		if not arg.startswith('--'):
+			if args.action is not None:
+				sys.exit("unrecognized argument: {}\n{}".format(arg, USAGE))
+			args.action = arg
+			continue
+		name, sep, value = arg[2:].partition('=')
+		if name not in ('secret_id', 'file', 'direction'):
+			sys.exit("unrecognized argument: {}\n{}".format(arg, USAGE))
+		if not sep:
+			value = next(argv, None)
+			if value is None or value.startswith('--'):
+				sys.exit("argument --{} expects a value\n{}".format(name, USAGE))
+		setattr(args, name, value)
+	return args
+
+# run independent gcloud and k8s calls concurrently and return their results in order.
+# every call runs to completion, even if another one fails. each failure is reported
+# with its traceback before the script exits, and the calls' output may interleave.
+def runConcurrently(*calls):
+	# imported here since concurrent.futures pulls in logging and re at startup
+	from concurrent.futures import ThreadPoolExecutor
+	with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+		futures = [executor.submit(*call) for call in calls]
+	failed = [(call[0].__name__, f.exception()) for call, f in zip(calls, futures) if f.exception() is not None]
+	if failed:
+		import traceback
+		for name, e in failed:
+			print("{} failed:".format(name), file=sys.stderr)
+			traceback.print_exception(type(e), e, e.__traceback__)
+		sys.exit(1)
+	return [f.result() for f in futures]
+
+def gcloudCreateSecretWithVersion(secret_id, file):
+	gcloudCreateSecret(secret_id)
+	gcloudAddSecrVersion(secret_id, file)
 
 
 def main(args):
@@ -19,16 +62,17 @@ def main(args):
 	if args.action == 'create':
 		if args.secret_id is None or args.file is None:
 			sys.exit("requires '--secret_id' and '--file' arguments")
-		gcloudCreateSecret(args.secret_id)
-		gcloudAddSecrVersion(args.secret_id, args.file)
-		k8sCreateSecret(args.secret_id, args.file)
+		runConcurrently(
+			(gcloudCreateSecretWithVersion, args.secret_id, args.file),
+			(k8sCreateSecret, args.secret_id, args.file))
 
 	# get secrets <args.secret_id>
 	elif args.action == 'get':
 		if args.secret_id is None:
 			sys.exit("requires '--secret_id' arguments")
-		gcloudAccessSecretVersion(args.secret_id, "latest")
-		k8sAccessSecret(args.secret_id)
+		runConcurrently(
+			(gcloudAccessSecretVersion, args.secret_id, "latest"),
+			(k8sAccessSecret, args.secret_id))
 		print("=============================")
 
 
@@ -36,8 +80,9 @@ def main(args):
 	elif args.action == 'delete':
 		if args.secret_id is None :
 			sys.exit("requires '--secret_id' argument")
-		gcloudDeleteSecret(args.secret_id)
-		k8sDeleteSecret(args.secret_id)
+		runConcurrently(
+			(gcloudDeleteSecret, args.secret_id),
+			(k8sDeleteSecret, args.secret_id))
 
 	# update secrets <args.secret_id> with file <args.file> in a platform and sync to the other platform
 	# k2g: update kubernetes secret first, then sync to gcloud sm
@@ -49,8 +94,9 @@ def main(args):
 		if args.direction == "k2g":
 			print("Update k8s secret: ")
 			k8sUpdateSecret(args.secret_id, args.file)
-			new_secret = k8sAccessSecret(args.secret_id)
-			gcloudAccessSecretVersion(args.secret_id, "latest")
+			new_secret, _ = runConcurrently(
+				(k8sAccessSecret, args.secret_id),
+				(gcloudAccessSecretVersion, args.secret_id, "latest"))
 			
 			# sync
 			print("\n Synchronizing the secret [{}] from k8s to gcloud SM...\n".format(args.secret_id))
@@ -58,8 +104,9 @@ def main(args):
 		elif args.direction == "g2k":
 			print("Update gcloud secret: ")
 			gcloudAddSecrVersion(args.secret_id, args.file)
-			new_secret = gcloudAccessSecretVersion(args.secret_id, "latest")
-			k8sAccessSecret(args.secret_id)
+			new_secret, _ = runConcurrently(
+				(gcloudAccessSecretVersion, args.secret_id, "latest"),
+				(k8sAccessSecret, args.secret_id))
 			
 			# sync
 			print("\n Synchronizing the secret [{}] from gcloud sM to k8s...\n".format(args.secret_id))
@@ -67,8 +114,9 @@ def main(args):
 		else:
 			sys.exit("missing or invalid '--direction' argument, options: k2g or g2k")
 
-		gcloudAccessSecretVersion(args.secret_id, "latest")
-		k8sAccessSecret(args.secret_id)
+		runConcurrently(
+			(gcloudAccessSecretVersion, args.secret_id, "latest"),
+			(k8sAccessSecret, args.secret_id))
 		print("Sync'ed.")
 		print("=============================\n")
 
@@ -78,4 +126,4 @@ def main(args):
 
 
 if __name__ == '__main__':
-	main(parse_args())
+	main(parse_args(sys.argv[1:]))